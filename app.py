@@ -3,14 +3,39 @@ Streamlit Frontend - Stock Market Finance Application
 Main application entry point.
 """
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
-import plotly.express as px
+import plotly.io as pio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 # Configuration
 API_BASE_URL = "http://localhost:8000/api/v1"
+HEALTH_URL = "http://localhost:8000/health"
+API_TIMEOUT = (1, 5)  # (connect, read) seconds
+API_MUTATE_TIMEOUT = (1, 60)  # writes may wait on Yahoo Finance
+MAX_CHART_POINTS = 500  # more candles than a full-width chart can tell apart
+PRICE_HISTORY_LIMIT = 365  # rows pulled for client-side analysis
+
+_PRICE_COLS = ("id", "date", "open_price", "high_price", "low_price", "close_price", "volume")
+# Float dtypes so a missing value becomes NaN instead of failing the cast.
+# Close stays float64 because the client-side analysis works from it.
+_PRICE_DTYPES = {
+    "open_price": "float32",
+    "high_price": "float32",
+    "low_price": "float32",
+    "close_price": "float64",
+    "volume": "float64",
+}
+
+# Serialise figures with orjson rather than the stdlib json encoder
+pio.json.config.default_engine = "orjson"
 
 st.set_page_config(
     page_title="Stock Market Finance App",
@@ -20,37 +45,276 @@ st.set_page_config(
 )
 
 
+def get_session() -> requests.Session:
+    """Return the pooled HTTP session for this Streamlit session."""
+    if "http" not in st.session_state:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=20,
+            # Retry failed connects only; read=False re-raises the first read
+            # timeout so a hung backend surfaces as Timeout, not ConnectionError.
+            max_retries=Retry(total=2, read=False, backoff_factor=0.1),
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        # Health probes must fail fast, so they skip the retrying adapter
+        session.mount(HEALTH_URL, HTTPAdapter(max_retries=0))
+        st.session_state["http"] = session
+    return st.session_state["http"]
+
+
+class APIError(Exception):
+    """Non-success response from the backend API."""
+
+
+def _parse_response(response: requests.Response):
+    """Decode a backend response, raising APIError on failure."""
+    if response.status_code in [200, 201]:
+        return orjson.loads(response.content)
+    elif response.status_code == 204:
+        return {"success": True}
+    else:
+        raise APIError(orjson.loads(response.content).get("detail", "API Error"))
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _fetch_api_get(_session: requests.Session, endpoint: str, params: tuple = ()):
+    """Cached GET request. Errors are raised so they are never cached."""
+    response = _session.get(
+        f"{API_BASE_URL}{endpoint}", params=dict(params) or None, timeout=API_TIMEOUT
+    )
+    return _parse_response(response)
+
+
+def _fetch_api_mutate(endpoint: str, method: str, data: dict = None):
+    """Uncached POST/PUT/DELETE request."""
+    session = get_session()
+    url = f"{API_BASE_URL}{endpoint}"
+    if method == "POST":
+        response = session.post(url, json=data, timeout=API_MUTATE_TIMEOUT)
+    elif method == "PUT":
+        response = session.put(url, json=data, timeout=API_MUTATE_TIMEOUT)
+    elif method == "DELETE":
+        response = session.delete(url, timeout=API_MUTATE_TIMEOUT)
+    else:
+        return {"error": "Invalid method"}
+    
+    return _parse_response(response)
+
+
+def invalidate_cache():
+    """Drop cached GET responses after the backend data has changed."""
+    _fetch_api_get.clear()
+
+
 def fetch_api(endpoint: str, method: str = "GET", data: dict = None) -> dict:
     """Make API request to backend."""
-    url = f"{API_BASE_URL}{endpoint}"
     try:
         if method == "GET":
-            response = requests.get(url, params=data)
-        elif method == "POST":
-            response = requests.post(url, json=data)
-        elif method == "PUT":
-            response = requests.put(url, json=data)
-        elif method == "DELETE":
-            response = requests.delete(url)
-        else:
-            return {"error": "Invalid method"}
+            return _fetch_api_get(get_session(), endpoint, tuple(sorted((data or {}).items())))
         
-        if response.status_code in [200, 201]:
-            return response.json()
-        elif response.status_code == 204:
-            return {"success": True}
-        else:
-            return {"error": response.json().get("detail", "API Error")}
+        result = _fetch_api_mutate(endpoint, method, data)
+        if "error" not in result:
+            invalidate_cache()
+        return result
+    except APIError as e:
+        return {"error": str(e)}
     except requests.exceptions.ConnectionError:
         return {"error": "Cannot connect to backend API. Make sure the server is running."}
+    except requests.exceptions.Timeout:
+        return {"error": "Backend API timed out."}
     except Exception as e:
         return {"error": str(e)}
 
 
+def get_stocks():
+    """All tracked stocks."""
+    return fetch_api("/stocks/")
+
+
+def get_prices(stock_id: int, limit: int = PRICE_HISTORY_LIMIT):
+    """Most recent ``limit`` price rows for a stock."""
+    return fetch_api(f"/prices/{stock_id}", data={"limit": limit})
+
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _probe_health(_session: requests.Session):
+    """Status code of the backend health endpoint, cached briefly."""
+    try:
+        return _session.get(HEALTH_URL, timeout=(0.5, 1.0)).status_code
+    except requests.exceptions.RequestException:
+        return None
+
+
+def check_health():
+    """Health endpoint status code, or None if the backend is unreachable."""
+    return _probe_health(get_session())
+
+
+def fetch_many(calls: dict) -> dict:
+    """Run independent GET requests concurrently.
+    
+    ``calls`` maps a key to an ``(endpoint, params)`` pair; the result maps
+    the same keys to what ``fetch_api`` returned for each call.
+    
+    Threads rather than an async client: an ``httpx.AsyncClient`` is bound
+    to the event loop it first runs on, so it cannot outlive one
+    ``asyncio.run`` call, and it would bypass the pooled session and the
+    cached GET layer that ``fetch_api`` goes through.
+    """
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(max_workers=8, initializer=add_script_run_ctx, initargs=(None, ctx)) as ex:
+        futures = {k: ex.submit(fetch_api, ep, "GET", p) for k, (ep, p) in calls.items()}
+        return {k: f.result() for k, f in futures.items()}
+
+
+@st.cache_data(ttl=60, max_entries=64, show_spinner=False)
+def _prices_to_df(payload: bytes) -> pd.DataFrame:
+    """Cached DataFrame build, keyed on the serialised rows."""
+    df = pd.DataFrame.from_records(orjson.loads(payload), columns=_PRICE_COLS).astype(_PRICE_DTYPES)
+    df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d', cache=True)
+    return df.sort_values('date').reset_index(drop=True)
+
+
+def prices_to_df(prices: list) -> pd.DataFrame:
+    """Build a date-sorted DataFrame from price rows returned by the API.
+    
+    The rows are keyed as orjson bytes, which hash far faster than the
+    list of dicts st.cache_data would otherwise walk.
+    """
+    return _prices_to_df(orjson.dumps(prices))
+
+
+def vol_stats(close: np.ndarray, lookback: int) -> dict:
+    """Volatility metrics over the last ``lookback`` closing prices."""
+    c = np.asarray(close[-lookback:], dtype=np.float64)
+    r = np.diff(np.log(c))
+    return {
+        "volatility": float(r.std(ddof=1) * np.sqrt(252) * 100),
+        "avg_daily_return": float(r.mean() * 100),
+        "price_range_pct": float((c.max() - c.min()) / c.min() * 100),
+        "min_price": float(c.min()),
+        "max_price": float(c.max()),
+    }
+
+
+def project(hist_df: pd.DataFrame, days_ahead: int) -> dict:
+    """Linear-trend projection of closing price ``days_ahead`` calendar days out.
+    
+    The trend is fitted against calendar-day offsets, so gaps for weekends
+    and holidays don't steepen the projected line.
+    """
+    days = (hist_df['date'] - hist_df['date'].iloc[0]).dt.days.to_numpy(dtype=np.float64)
+    y = hist_df['close_price'].to_numpy(dtype=np.float64)
+    m, b = np.polyfit(days, y, 1)
+    yhat = m * days + b
+    ss_res = ((y - yhat) ** 2).sum()
+    ss_tot = ((y - y.mean()) ** 2).sum()
+    r_squared = 1 - ss_res / ss_tot if ss_tot else 0.0
+    
+    ahead = np.arange(1, days_ahead + 1)
+    proj = m * (days[-1] + ahead) + b
+    dates = hist_df['date'].iloc[-1] + pd.to_timedelta(ahead, unit="D")
+    return {
+        "last_price": float(y[-1]),
+        "trend": "bullish" if m > 0 else "bearish",
+        "daily_change_rate": float(m),
+        "r_squared": float(r_squared),
+        "projections": [
+            {"date": d.date().isoformat(), "projected_price": float(p)}
+            for d, p in zip(dates, proj)
+        ],
+    }
+
+
+def decimate(df: pd.DataFrame, n: int = MAX_CHART_POINTS) -> pd.DataFrame:
+    """Reduce a date-sorted price DataFrame to at most ``n`` rows for charting.
+    
+    Consecutive rows are merged into equal-sized buckets, keeping each
+    bucket's open, high, low and close so candles stay faithful.
+    """
+    if len(df) <= n:
+        return df
+    
+    step = -(-len(df) // n)
+    agg = {
+        "date": "first",
+        "open_price": "first",
+        "high_price": "max",
+        "low_price": "min",
+        "close_price": "last",
+        "volume": "sum",
+    }
+    return df.groupby(np.arange(len(df)) // step).agg(agg).reset_index(drop=True)
+
+
+def default_date(days_ago: int = 0):
+    """Date ``days_ago`` days before today, fixed for the session."""
+    today = st.session_state.setdefault("_today", datetime.now().date())
+    return today - timedelta(days=days_ago)
+
+
+def select_stock(stocks: list) -> dict:
+    """Stock selectbox keyed by list index rather than display label."""
+    idx = st.selectbox(
+        "Select Stock",
+        range(len(stocks)),
+        format_func=lambda i: f"{stocks[i]['symbol']} - {stocks[i]['name']}",
+    )
+    return stocks[idx]
+
+
+def build_price_figure(plot_df: pd.DataFrame, symbol: str, chart_type: str) -> go.Figure:
+    """Candlestick or line figure for a price series."""
+    if chart_type == "Candlestick":
+        fig = go.Figure(data=[go.Candlestick(
+            x=plot_df['date'],
+            open=plot_df['open_price'],
+            high=plot_df['high_price'],
+            low=plot_df['low_price'],
+            close=plot_df['close_price'],
+            name=symbol
+        )])
+    else:
+        fig = go.Figure(data=[go.Scattergl(
+            x=plot_df['date'],
+            y=plot_df['close_price'],
+            mode='lines',
+            name=symbol
+        )])
+        fig.update_layout(title=f"{symbol} Closing Price")
+    
+    fig.update_layout(
+        xaxis_title="Date",
+        yaxis_title="Price ($)",
+        height=500,
+        xaxis_rangeslider_visible=False,
+        uirevision=symbol,
+    )
+    
+    return fig
+
+
+def build_volume_figure(plot_df: pd.DataFrame, symbol: str) -> go.Figure:
+    """Volume bar figure for a price series."""
+    fig = go.Figure(data=[go.Bar(x=plot_df['date'], y=plot_df['volume'])])
+    fig.update_layout(
+        height=300,
+        bargap=0,
+        xaxis_title="Date",
+        yaxis_title="Volume",
+        uirevision=symbol,
+    )
+    return fig
+
+
 def main():
     """Main application."""
     st.title("📈 Stock Market Finance Application")
     
+    get_session()
+    
     # Sidebar navigation
     st.sidebar.title("Navigation")
     page = st.sidebar.selectbox(
@@ -75,7 +339,7 @@ def show_dashboard():
     st.header("Dashboard")
     
     # Get all stocks
-    stocks = fetch_api("/stocks/")
+    stocks = get_stocks()
     
     if "error" in stocks:
         st.error(stocks["error"])
@@ -86,21 +350,27 @@ def show_dashboard():
         st.info("No stocks in database. Add some stocks from the Stock Management page.")
         return
     
+    # Sector and active counts in a single pass
+    sectors = set()
+    active = 0
+    for s in stocks:
+        sector = s.get("sector")
+        if sector:
+            sectors.add(sector)
+        if s.get("is_active"):
+            active += 1
+    
     # Display stock cards
     col1, col2, col3 = st.columns(3)
     
     with col1:
         st.metric("Total Stocks", len(stocks))
     
-    # Get sectors count
-    sectors = set(s.get("sector") for s in stocks if s.get("sector"))
     with col2:
         st.metric("Sectors", len(sectors))
     
-    # Active stocks
-    active_stocks = [s for s in stocks if s.get("is_active")]
     with col3:
-        st.metric("Active Stocks", len(active_stocks))
+        st.metric("Active Stocks", active)
     
     st.divider()
     
@@ -171,69 +441,71 @@ def show_stock_management():
     with tab2:
         st.subheader("Your Stocks")
         
-        stocks = fetch_api("/stocks/")
+        stocks = get_stocks()
         
         if "error" in stocks:
             st.error(stocks["error"])
         elif not stocks:
             st.info("No stocks found. Add some stocks first!")
         else:
-            for stock in stocks:
-                with st.expander(f"{stock['symbol']} - {stock['name']}"):
-                    col1, col2, col3 = st.columns([2, 2, 1])
-                    
-                    with col1:
-                        st.write(f"**Sector:** {stock.get('sector', 'N/A')}")
-                        st.write(f"**Industry:** {stock.get('industry', 'N/A')}")
-                    
-                    with col2:
-                        st.write(f"**Exchange:** {stock.get('exchange', 'N/A')}")
-                        st.write(f"**Active:** {'Yes' if stock.get('is_active') else 'No'}")
-                    
-                    with col3:
-                        if st.button("Delete", key=f"delete_{stock['id']}"):
-                            result = fetch_api(f"/stocks/{stock['id']}", method="DELETE")
-                            if "error" not in result:
-                                st.success("Deleted!")
-                                st.rerun()
+            df = pd.DataFrame(stocks)
+            display_cols = ["symbol", "name", "sector", "industry", "exchange", "is_active"]
+            display_cols = [c for c in display_cols if c in df.columns]
+            
+            selection = st.dataframe(
+                df[display_cols],
+                use_container_width=True,
+                hide_index=True,
+                on_select="rerun",
+                selection_mode="single-row",
+                key="stocks_table",
+            )
+            rows = selection.selection.rows
+            
+            if st.button("Delete Selected", disabled=not rows):
+                stock = stocks[rows[0]]
+                result = fetch_api(f"/stocks/{stock['id']}", method="DELETE")
+                if "error" in result:
+                    st.error(result["error"])
+                else:
+                    st.success(f"Deleted {stock['symbol']}!")
+                    st.rerun()
     
     with tab3:
         st.subheader("Fetch Historical Prices")
         
-        stocks = fetch_api("/stocks/")
+        stocks = get_stocks()
         
         if "error" in stocks:
             st.error(stocks["error"])
         elif not stocks:
             st.info("No stocks found. Add some stocks first!")
         else:
-            stock_options = {f"{s['symbol']} - {s['name']}": s['symbol'] for s in stocks}
-            selected = st.selectbox("Select Stock", list(stock_options.keys()))
+            use_dates = st.checkbox("Use custom date range")
             
-            col1, col2 = st.columns(2)
-            
-            with col1:
+            with st.form("fetch_prices_form"):
+                stock = select_stock(stocks)
+                
                 period = st.selectbox(
                     "Period",
                     ["1mo", "3mo", "6mo", "1y", "2y", "5y", "max"],
                     index=0
                 )
+                
+                start_date = None
+                end_date = None
+                
+                if use_dates:
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        start_date = st.date_input("Start Date", default_date(30))
+                    with col2:
+                        end_date = st.date_input("End Date", default_date())
+                
+                submitted = st.form_submit_button("Fetch Prices", type="primary")
             
-            with col2:
-                use_dates = st.checkbox("Use custom date range")
-            
-            start_date = None
-            end_date = None
-            
-            if use_dates:
-                col1, col2 = st.columns(2)
-                with col1:
-                    start_date = st.date_input("Start Date", datetime.now() - timedelta(days=30))
-                with col2:
-                    end_date = st.date_input("End Date", datetime.now())
-            
-            if st.button("Fetch Prices", type="primary"):
-                symbol = stock_options[selected]
+            if submitted:
+                symbol = stock['symbol']
                 
                 data = {"symbol": symbol, "period": period}
                 if use_dates:
@@ -253,7 +525,7 @@ def show_price_history():
     """Price history page."""
     st.header("Price History")
     
-    stocks = fetch_api("/stocks/")
+    stocks = get_stocks()
     
     if "error" in stocks:
         st.error(stocks["error"])
@@ -264,18 +536,16 @@ def show_price_history():
         return
     
     # Stock selector
-    stock_options = {f"{s['symbol']} - {s['name']}": s for s in stocks}
-    selected = st.selectbox("Select Stock", list(stock_options.keys()))
-    stock = stock_options[selected]
+    stock = select_stock(stocks)
     
     # Date range
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        start_date = st.date_input("Start Date", datetime.now() - timedelta(days=90))
+        start_date = st.date_input("Start Date", default_date(90))
     
     with col2:
-        end_date = st.date_input("End Date", datetime.now())
+        end_date = st.date_input("End Date", default_date())
     
     with col3:
         limit = st.number_input("Max Records", min_value=10, max_value=1000, value=200)
@@ -287,7 +557,12 @@ def show_price_history():
         "limit": limit,
     }
     
-    prices = fetch_api(f"/prices/{stock['id']}", data=params)
+    results = fetch_many({
+        "prices": (f"/prices/{stock['id']}", params),
+        "stats": (f"/prices/{stock['id']}/stats", None),
+    })
+    prices = results["prices"]
+    stats = results["stats"]
     
     if "error" in prices:
         st.error(prices["error"])
@@ -298,15 +573,11 @@ def show_price_history():
         return
     
     # Convert to DataFrame
-    df = pd.DataFrame(prices)
-    df['date'] = pd.to_datetime(df['date'])
-    df = df.sort_values('date')
+    df = prices_to_df(prices)
     
     # Display stats
     st.subheader("Statistics")
     
-    stats = fetch_api(f"/prices/{stock['id']}/stats")
-    
     if "error" not in stats:
         col1, col2, col3, col4 = st.columns(4)
         
@@ -322,45 +593,35 @@ def show_price_history():
     # Candlestick chart
     st.subheader("Price Chart")
     
-    chart_type = st.radio("Chart Type", ["Candlestick", "Line"], horizontal=True)
-    
-    if chart_type == "Candlestick":
-        fig = go.Figure(data=[go.Candlestick(
-            x=df['date'],
-            open=df['open_price'],
-            high=df['high_price'],
-            low=df['low_price'],
-            close=df['close_price'],
-            name=stock['symbol']
-        )])
-    else:
-        fig = px.line(df, x='date', y='close_price', title=f"{stock['symbol']} Closing Price")
-    
-    fig.update_layout(
-        xaxis_title="Date",
-        yaxis_title="Price ($)",
-        height=500,
-    )
+    plot_df = decimate(df)
     
-    st.plotly_chart(fig, use_container_width=True)
+    _price_chart_fragment(plot_df, stock['symbol'])
     
     # Volume chart
     st.subheader("Trading Volume")
     
-    fig_volume = px.bar(df, x='date', y='volume')
-    fig_volume.update_layout(height=300)
-    st.plotly_chart(fig_volume, use_container_width=True)
+    fig_volume = build_volume_figure(plot_df, stock['symbol'])
+    st.plotly_chart(fig_volume, use_container_width=True, config={"responsive": True})
     
     # Raw data
     with st.expander("View Raw Data"):
         st.dataframe(df, use_container_width=True)
 
 
+@st.fragment
+def _price_chart_fragment(plot_df: pd.DataFrame, symbol: str):
+    """Price chart with its chart-type toggle, rerun on its own."""
+    chart_type = st.radio("Chart Type", ["Candlestick", "Line"], horizontal=True)
+    
+    fig = build_price_figure(plot_df, symbol, chart_type)
+    st.plotly_chart(fig, use_container_width=True, config={"responsive": True})
+
+
 def show_projections():
     """Projections page."""
     st.header("Stock Projections & Analysis")
     
-    stocks = fetch_api("/stocks/")
+    stocks = get_stocks()
     
     if "error" in stocks:
         st.error(stocks["error"])
@@ -371,30 +632,35 @@ def show_projections():
         return
     
     # Stock selector
-    stock_options = {f"{s['symbol']} - {s['name']}": s for s in stocks}
-    selected = st.selectbox("Select Stock", list(stock_options.keys()))
-    stock = stock_options[selected]
+    stock = select_stock(stocks)
     
     tab1, tab2, tab3 = st.tabs(["Price Projection", "Moving Average", "Volatility"])
     
     with tab1:
         st.subheader("Price Projection")
         
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            days_ahead = st.slider("Days to Project", 7, 90, 30)
-        
-        with col2:
-            lookback = st.slider("Historical Days for Trend", 30, 365, 90)
+        with st.form("proj_form"):
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                days_ahead = st.slider("Days to Project", 7, 90, 30)
+            
+            with col2:
+                lookback = st.slider("Historical Days for Trend", 30, 365, 90)
+            
+            submitted = st.form_submit_button("Calculate Projection")
         
-        if st.button("Calculate Projection", key="proj_btn"):
-            params = {"days_ahead": days_ahead, "lookback_days": lookback}
-            projection = fetch_api(f"/prices/{stock['id']}/projection", data=params)
+        if submitted:
+            prices = get_prices(stock['id'])
             
-            if "error" in projection:
-                st.error(projection["error"])
+            if "error" in prices:
+                st.error(prices["error"])
+            elif len(prices) < 2:
+                st.warning("Not enough price data for a projection")
             else:
+                hist_df = prices_to_df(prices).tail(lookback)
+                projection = project(hist_df, days_ahead)
+                
                 # Display projection info
                 col1, col2, col3 = st.columns(3)
                 
@@ -412,26 +678,16 @@ def show_projections():
                 proj_df = pd.DataFrame(projection['projections'])
                 proj_df['date'] = pd.to_datetime(proj_df['date'])
                 
-                # Get historical prices for context
-                hist_prices = fetch_api(f"/prices/{stock['id']}", data={"limit": lookback})
-                
-                if not isinstance(hist_prices, list):
-                    hist_prices = []
-                
                 fig = go.Figure()
                 
-                if hist_prices:
-                    hist_df = pd.DataFrame(hist_prices)
-                    hist_df['date'] = pd.to_datetime(hist_df['date'])
-                    hist_df = hist_df.sort_values('date')
-                    
-                    fig.add_trace(go.Scatter(
-                        x=hist_df['date'],
-                        y=hist_df['close_price'],
-                        mode='lines',
-                        name='Historical',
-                        line=dict(color='blue')
-                    ))
+                # Historical prices for context
+                fig.add_trace(go.Scatter(
+                    x=hist_df['date'],
+                    y=hist_df['close_price'],
+                    mode='lines',
+                    name='Historical',
+                    line=dict(color='blue')
+                ))
                 
                 fig.add_trace(go.Scatter(
                     x=proj_df['date'],
@@ -453,66 +709,73 @@ def show_projections():
     with tab2:
         st.subheader("Moving Average Analysis")
         
-        window = st.slider("Moving Average Window (days)", 5, 100, 20)
+        with st.form("ma_form"):
+            window = st.slider("Moving Average Window (days)", 5, 100, 20)
+            st.form_submit_button("Update Moving Average")
         
-        if st.button("Calculate Moving Average", key="ma_btn"):
-            ma_data = fetch_api(f"/prices/{stock['id']}/moving-average", data={"window": window})
+        prices = get_prices(stock['id'])
+        
+        if "error" in prices:
+            st.error(prices["error"])
+        elif prices:
+            df = prices_to_df(prices)
+            moving_average = df['close_price'].rolling(int(window), min_periods=1).mean()
             
-            if "error" in ma_data:
-                st.error(ma_data["error"])
-            elif isinstance(ma_data, list) and ma_data:
-                df = pd.DataFrame(ma_data)
-                df['date'] = pd.to_datetime(df['date'])
-                
-                fig = go.Figure()
-                
-                fig.add_trace(go.Scatter(
-                    x=df['date'],
-                    y=df['close_price'],
-                    mode='lines',
-                    name='Close Price',
-                    line=dict(color='blue')
-                ))
-                
-                fig.add_trace(go.Scatter(
-                    x=df['date'],
-                    y=df['moving_average'],
-                    mode='lines',
-                    name=f'{window}-day MA',
-                    line=dict(color='orange')
-                ))
-                
-                fig.update_layout(
-                    title=f"{stock['symbol']} Moving Average",
-                    xaxis_title="Date",
-                    yaxis_title="Price ($)",
-                    height=500,
-                )
-                
-                st.plotly_chart(fig, use_container_width=True)
-            else:
-                st.warning("No data available for moving average calculation")
+            fig = go.Figure()
+            
+            fig.add_trace(go.Scatter(
+                x=df['date'],
+                y=df['close_price'],
+                mode='lines',
+                name='Close Price',
+                line=dict(color='blue')
+            ))
+            
+            fig.add_trace(go.Scatter(
+                x=df['date'],
+                y=moving_average,
+                mode='lines',
+                name=f'{window}-day MA',
+                line=dict(color='orange')
+            ))
+            
+            fig.update_layout(
+                title=f"{stock['symbol']} Moving Average",
+                xaxis_title="Date",
+                yaxis_title="Price ($)",
+                height=500,
+            )
+            
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.warning("No data available for moving average calculation")
     
     with tab3:
         st.subheader("Volatility Analysis")
         
-        vol_lookback = st.slider("Analysis Period (days)", 7, 180, 30)
+        with st.form("vol_form"):
+            vol_lookback = st.slider("Analysis Period (days)", 7, 180, 30)
+            st.form_submit_button("Update Volatility")
+        
+        prices = get_prices(stock['id'])
         
-        if st.button("Calculate Volatility", key="vol_btn"):
-            volatility = fetch_api(f"/prices/{stock['id']}/volatility", data={"lookback_days": vol_lookback})
+        if "error" in prices:
+            st.error(prices["error"])
+        elif len(prices) < 3:
+            st.warning("Not enough price data for volatility analysis")
+        else:
+            close = prices_to_df(prices)['close_price'].to_numpy()
+            volatility = vol_stats(close, vol_lookback)
             
-            if "error" in volatility:
-                st.error(volatility["error"])
-            else:
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.metric("Annualized Volatility", f"{volatility['volatility']:.2f}%")
-                    st.metric("Average Daily Return", f"{volatility['avg_daily_return']:.4f}%")
-                
-                with col2:
-                    st.metric("Price Range", f"{volatility['price_range_pct']:.2f}%")
-                    st.metric("Min/Max", f"${volatility['min_price']:.2f} - ${volatility['max_price']:.2f}")
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.metric("Annualized Volatility", f"{volatility['volatility']:.2f}%")
+                st.metric("Average Daily Return", f"{volatility['avg_daily_return']:.4f}%")
+            
+            with col2:
+                st.metric("Price Range", f"{volatility['price_range_pct']:.2f}%")
+                st.metric("Min/Max", f"${volatility['min_price']:.2f} - ${volatility['max_price']:.2f}")
 
 
 def show_settings():
@@ -526,13 +789,12 @@ def show_settings():
     st.subheader("System Status")
     
     if st.button("Check API Health"):
-        try:
-            response = requests.get("http://localhost:8000/health")
-            if response.status_code == 200:
-                st.success("✅ Backend API is running")
-            else:
-                st.error("❌ Backend API returned an error")
-        except:
+        status = check_health()
+        if status == 200:
+            st.success("✅ Backend API is running")
+        elif status is not None:
+            st.error("❌ Backend API returned an error")
+        else:
             st.error("❌ Cannot connect to Backend API")
 
 